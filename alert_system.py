@@ -40,10 +40,19 @@ class AlertSystem:
 • RSI: {signal['indicators']['rsi']:.1f}
 • Short MA: ${signal['indicators']['ma_short']:.2f}
 • Long MA: ${signal['indicators']['ma_long']:.2f}
-
-*Reasons:*
 """
         
+        if "risk" in signal:
+            risk = signal["risk"]
+            message += f"""
+*Risk:*
+• Stop Loss: ${risk['stop_loss']:.2f}
+• Take Profit: ${risk['take_profit']:.2f}
+• Size: {risk['position_size']:.4f} oz
+"""
+        
+        message += "\n*Reasons:*\n"
+        
         for reason in signal.get('reasons', []):
             message += f"• {reason}\n"
         
@@ -16,14 +16,38 @@ RSI_OVERBOUGHT = 70
 RSI_OVERSOLD = 30
 MA_SHORT_PERIOD = 20
 MA_LONG_PERIOD = 50
+SIGNAL_HISTORY_DAYS = 7  # Calendar days of daily bars behind the signal rules
+ATR_HISTORY_DAYS = 30  # Calendar days fetched for ATR, enough for a full ATR_PERIOD
 
 # Risk Management
-MAX_POSITION_SIZE = 0.02  # 2% of capital per trade
+ACCOUNT_CAPITAL = float(os.getenv("ACCOUNT_CAPITAL", "10000"))
+MAX_POSITION_SIZE = 0.02  # Risk per trade: 2% of capital lost if the stop is hit
+MAX_LEVERAGE = float(os.getenv("MAX_LEVERAGE", "1.0"))  # Position value cap as a multiple of capital
 STOP_LOSS_ATR_MULTIPLIER = 2.0
 TAKE_PROFIT_RATIO = 2.0  # 1:2 risk-reward
+ATR_PERIOD = 14
+MONTE_CARLO_SIMULATIONS = 5000  # Bootstrapped trade sequences
+MONTE_CARLO_TRADES = 100  # Trades per sequence
+RUIN_THRESHOLD = 0.5  # Fraction of capital lost that counts as ruin
+
+# Outcome Labeling
+OUTCOME_HORIZONS = (1, 3, 5)  # Forward bars (one return column per horizon in signal_outcomes)
+OUTCOME_BATCH_SIZE = 100000  # Signals labeled per batch
 
 # Database Settings
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///trading_bot.db")
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", DATABASE_URL)  # Read replica (optional)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = 30  # Seconds to wait for a pooled connection
+DB_POOL_RECYCLE = 1800  # Seconds before a pooled connection is replaced
+DB_BUSY_TIMEOUT = 5000  # SQLite milliseconds to wait on a locked database
+
+# Worker Coordination
+WORKER_ID = os.getenv("WORKER_ID", os.getenv("RENDER_INSTANCE_ID", ""))  # Defaults to host-pid
+RUN_INTERVAL_MINUTES = 15
+HEARTBEAT_INTERVAL = 15  # Seconds between heartbeats and lease renewals
+LEASE_TTL = 60  # Seconds before a silent worker's leases can be taken over
 
 # Telegram Bot (Optional)
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
@@ -0,0 +1,211 @@
+# coordinator.py - Leader election and work sharding across bot replicas
+import os
+import hashlib
+import socket
+import threading
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update, delete, func, or_
+from sqlalchemy.exc import IntegrityError
+from config import WORKER_ID, RUN_INTERVAL_MINUTES, HEARTBEAT_INTERVAL, LEASE_TTL
+from database import db_manager, JobLease, WorkerHeartbeat, AlertClaim
+
+class Coordinator:
+    def __init__(self, db=None, worker_id=WORKER_ID, lease_ttl=LEASE_TTL):
+        self.db = db or db_manager
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_ttl = timedelta(seconds=lease_ttl)
+        self._stop_heartbeat = threading.Event()
+        self._heartbeat_thread = None
+
+    def start_heartbeat(self, interval=HEARTBEAT_INTERVAL):
+        """Heartbeat from a background thread so leases outlive long-running jobs"""
+        if self._heartbeat_thread and self._heartbeat_thread.is_alive():
+            return
+
+        self.heartbeat()
+        self._stop_heartbeat.clear()
+        self._heartbeat_thread = threading.Thread(
+            target=self._heartbeat_loop, args=(interval,), name="heartbeat", daemon=True
+        )
+        self._heartbeat_thread.start()
+
+    def stop_heartbeat(self):
+        """Stop the background heartbeat"""
+        self._stop_heartbeat.set()
+        if self._heartbeat_thread:
+            self._heartbeat_thread.join()
+            self._heartbeat_thread = None
+
+    def _heartbeat_loop(self, interval):
+        while not self._stop_heartbeat.wait(interval):
+            self.heartbeat()
+
+    def _db_now(self, session):
+        """Current UTC time from the database clock, shared by every replica"""
+        now = session.execute(select(func.now())).scalar()
+        if now.tzinfo:
+            now = now.astimezone(timezone.utc).replace(tzinfo=None)
+        return now
+
+    def heartbeat(self):
+        """Mark this worker alive and renew every lease it holds"""
+        try:
+            with self.db.write_session() as session:
+                now = self._db_now(session)
+                renewed = session.execute(
+                    update(WorkerHeartbeat)
+                    .where(WorkerHeartbeat.worker_id == self.worker_id)
+                    .values(last_seen=now)
+                    .execution_options(synchronize_session=False)
+                )
+                if renewed.rowcount == 0:
+                    session.add(WorkerHeartbeat(worker_id=self.worker_id, last_seen=now))
+
+                session.execute(
+                    update(JobLease)
+                    .where(JobLease.owner == self.worker_id)
+                    .values(expires_at=now + self.lease_ttl)
+                    .execution_options(synchronize_session=False)
+                )
+            return True
+
+        except Exception as e:
+            print(f"❌ Heartbeat failed: {e}")
+            return False
+
+    def get_live_workers(self):
+        """Worker IDs that have sent a heartbeat within the lease TTL"""
+        try:
+            # Coordination state is read from the primary, never a lagging replica
+            with self.db.write_session() as session:
+                cutoff = self._db_now(session) - self.lease_ttl
+                rows = session.query(WorkerHeartbeat.worker_id)\
+                    .filter(WorkerHeartbeat.last_seen >= cutoff)\
+                    .all()
+            return sorted(row[0] for row in rows)
+
+        except Exception as e:
+            print(f"❌ Error reading live workers: {e}")
+            return None
+
+    def shard_owner(self, job_name):
+        """Pick the live worker responsible for a job (rendezvous hashing)"""
+        live_workers = self.get_live_workers()
+        if live_workers is None:
+            return None
+
+        workers = set(live_workers) | {self.worker_id}
+        return max(workers, key=lambda w: hashlib.md5(f"{job_name}:{w}".encode()).hexdigest())
+
+    def acquire_lease(self, job_name):
+        """Take or renew the lease on a job; True if this worker is now leader"""
+        try:
+            # Conditional update is atomic on both SQLite and Postgres
+            with self.db.write_session() as session:
+                now = self._db_now(session)
+                expires_at = now + self.lease_ttl
+                taken = session.execute(
+                    update(JobLease)
+                    .where(JobLease.job_name == job_name)
+                    .where(or_(JobLease.owner == self.worker_id, JobLease.expires_at < now))
+                    .values(owner=self.worker_id, expires_at=expires_at)
+                    .execution_options(synchronize_session=False)
+                )
+                if taken.rowcount:
+                    return True
+
+            # No lease row yet, the primary key settles a race between workers
+            with self.db.write_session() as session:
+                session.add(JobLease(job_name=job_name, owner=self.worker_id, expires_at=expires_at))
+            return True
+
+        except IntegrityError:
+            return False
+        except Exception as e:
+            print(f"❌ Error acquiring lease for {job_name}: {e}")
+            return False
+
+    def holds_lease(self, job_name):
+        """Check whether this worker currently leads a job"""
+        try:
+            with self.db.write_session() as session:
+                lease = session.get(JobLease, job_name)
+                return bool(lease and lease.owner == self.worker_id
+                            and lease.expires_at >= self._db_now(session))
+
+        except Exception as e:
+            print(f"❌ Error checking lease for {job_name}: {e}")
+            return False
+
+    def release_all(self):
+        """Give up every lease held by this worker"""
+        self.stop_heartbeat()
+        try:
+            with self.db.write_session() as session:
+                session.execute(
+                    delete(JobLease)
+                    .where(JobLease.owner == self.worker_id)
+                    .execution_options(synchronize_session=False)
+                )
+                session.execute(
+                    delete(WorkerHeartbeat)
+                    .where(WorkerHeartbeat.worker_id == self.worker_id)
+                    .execution_options(synchronize_session=False)
+                )
+        except Exception as e:
+            print(f"❌ Error releasing leases: {e}")
+
+    def run_if_leader(self, job_name, job, *args, **kwargs):
+        """Run a job only on the worker leading it.
+
+        A worker keeps jobs it already leads; free or expired leases are
+        only contested by the job's shard owner, so work spreads across
+        replicas and moves to a survivor once a leader stops heartbeating.
+        Heartbeats come from a background thread, so a leader stays alive
+        and keeps its lease for as long as the job runs.
+        """
+        if not self.holds_lease(job_name) and self.shard_owner(job_name) != self.worker_id:
+            return None
+
+        if not self.acquire_lease(job_name):
+            return None
+
+        return job(*args, **kwargs)
+
+    def current_tick(self, minutes=RUN_INTERVAL_MINUTES):
+        """Start of the current run interval, shared by all replicas"""
+        try:
+            with self.db.write_session() as session:
+                now = self._db_now(session)
+        except Exception as e:
+            print(f"❌ Error reading database time: {e}")
+            now = datetime.utcnow()
+        return now.replace(second=0, microsecond=0) - timedelta(minutes=now.minute % minutes)
+
+    def claim_alert(self, alert_key):
+        """Claim an alert so it is sent once; False if already claimed"""
+        try:
+            with self.db.write_session() as session:
+                session.add(AlertClaim(alert_key=alert_key, worker_id=self.worker_id))
+            return True
+
+        except IntegrityError:
+            return False
+        except Exception as e:
+            print(f"❌ Error claiming alert {alert_key}: {e}")
+            return False
+
+    def release_alert(self, alert_key):
+        """Drop an alert claim so a failed send can be retried"""
+        try:
+            with self.db.write_session() as session:
+                session.execute(
+                    delete(AlertClaim)
+                    .where(AlertClaim.alert_key == alert_key)
+                    .execution_options(synchronize_session=False)
+                )
+        except Exception as e:
+            print(f"❌ Error releasing alert {alert_key}: {e}")
+
+# Global instance
+coordinator = Coordinator()
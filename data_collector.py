@@ -3,7 +3,7 @@ import requests
 import yfinance as yf
 from datetime import datetime, timedelta
 import pandas as pd
-from config import METALPRICEAPI_KEY, SYMBOL
+from config import METALPRICEAPI_KEY, SYMBOL, SIGNAL_HISTORY_DAYS, ATR_HISTORY_DAYS
 import time
 
 class GoldDataCollector:
@@ -98,6 +98,18 @@ class GoldDataCollector:
             print(f"Error getting historical data: {e}")
             return None
     
+    def trim_historical_data(self, historical, days):
+        """Keep only the last `days` calendar days of historical data"""
+        if not historical:
+            return None
+        
+        cutoff = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        start = next(
+            (i for i, d in enumerate(historical["dates"]) if d >= cutoff),
+            len(historical["dates"])
+        )
+        return {key: values[start:] for key, values in historical.items()}
+    
     def collect_all_data(self):
         """Collect all market data"""
         print("Collecting market data...")
@@ -107,7 +119,8 @@ class GoldDataCollector:
             "gold_price": None,
             "dxy": None,
             "yields": None,
-            "historical": None
+            "historical": None,
+            "atr_history": None
         }
         
         # Get gold price
@@ -134,8 +147,9 @@ class GoldDataCollector:
             data["real_yield"] = real_yield
             print(f"✅ Real Yield: {real_yield:.2f}%")
         
-        # Get historical data (last 7 days)
-        data["historical"] = self.get_historical_data(days=7)
+        # Get historical data: the long window feeds ATR, signal rules keep the short one
+        data["atr_history"] = self.get_historical_data(days=ATR_HISTORY_DAYS)
+        data["historical"] = self.trim_historical_data(data["atr_history"], SIGNAL_HISTORY_DAYS)
         if data["historical"]:
             print(f"✅ Historical data: {len(data['historical']['prices'])} days")
         
@@ -153,7 +167,7 @@ if __name__ == "__main__":
     if data:
         print("\n📊 Data Collection Complete:")
         for key, value in data.items():
-            if key != "historical":
+            if key not in ("historical", "atr_history"):
                 print(f"{key}: {value}")
     else:
         print("Failed to collect data")
@@ -1,9 +1,18 @@
 # database.py - Database operations for storing signals
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime
+from sqlalchemy import create_engine, event, inspect, text, Column, Integer, String, Float, DateTime, ForeignKey, func
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, scoped_session
+from contextlib import contextmanager
 from datetime import datetime
-from config import DATABASE_URL
+from config import (
+    DATABASE_URL,
+    DATABASE_READ_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_BUSY_TIMEOUT
+)
 import json
 
 Base = declarative_base()
@@ -18,16 +27,162 @@ class TradingSignal(Base):
     price = Column(Float)
     reasons = Column(String(500))  # JSON string of reasons
     indicators = Column(String(500))  # JSON string of indicators
+    stop_loss = Column(Float)  # Levels issued with the signal (BUY/SELL only)
+    take_profit = Column(Float)
+    position_size = Column(Float)
     
     def __repr__(self):
         return f"<Signal {self.timestamp}: {self.action} at ${self.price}>"
 
+class PriceBar(Base):
+    __tablename__ = 'price_bars'
+    
+    timestamp = Column(DateTime, primary_key=True)
+    close = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
+    
+    def __repr__(self):
+        return f"<PriceBar {self.timestamp}: ${self.close}>"
+
+class SignalOutcome(Base):
+    __tablename__ = 'signal_outcomes'
+    
+    signal_id = Column(Integer, ForeignKey('trading_signals.id'), primary_key=True)
+    labeled_at = Column(DateTime, default=datetime.utcnow)
+    return_1 = Column(Float)  # Forward returns, one per OUTCOME_HORIZONS entry
+    return_3 = Column(Float)
+    return_5 = Column(Float)
+    outcome = Column(String(10))  # TARGET, STOP, OPEN, NONE (HOLD signals)
+    bars_to_exit = Column(Integer)
+    r_multiple = Column(Float)  # Trade result in units of initial risk
+    
+    def __repr__(self):
+        return f"<Outcome {self.signal_id}: {self.outcome} ({self.r_multiple}R)>"
+
+class JobLease(Base):
+    __tablename__ = 'job_leases'
+    
+    job_name = Column(String(100), primary_key=True)
+    owner = Column(String(100))  # Worker ID of the current leader
+    expires_at = Column(DateTime, index=True)
+    
+    def __repr__(self):
+        return f"<Lease {self.job_name}: {self.owner} until {self.expires_at}>"
+
+class WorkerHeartbeat(Base):
+    __tablename__ = 'worker_heartbeats'
+    
+    worker_id = Column(String(100), primary_key=True)
+    last_seen = Column(DateTime, index=True)
+    
+    def __repr__(self):
+        return f"<Worker {self.worker_id}: {self.last_seen}>"
+
+class AlertClaim(Base):
+    __tablename__ = 'alert_claims'
+    
+    alert_key = Column(String(100), primary_key=True)  # One row per alert ever sent
+    worker_id = Column(String(100))
+    claimed_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<AlertClaim {self.alert_key}: {self.worker_id}>"
+
+def build_engine(url, read_only=False):
+    """Create an engine tuned for its backend"""
+    if url.startswith("sqlite"):
+        engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False, "timeout": DB_BUSY_TIMEOUT / 1000}
+        )
+        
+        @event.listens_for(engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            # WAL lets readers run alongside the single writer
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT}")
+            if read_only:
+                cursor.execute("PRAGMA query_only=ON")
+            cursor.close()
+        
+        return engine
+    
+    return create_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+        execution_options={"postgresql_readonly": True} if read_only else {}
+    )
+
 class DatabaseManager:
-    def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
+    def __init__(self, url=DATABASE_URL, read_url=DATABASE_READ_URL):
+        self.engine = build_engine(url)
         Base.metadata.create_all(self.engine)
-        Session = sessionmaker(bind=self.engine)
-        self.session = Session()
+        self._add_missing_columns()
+        self.read_engine = build_engine(read_url, read_only=True)
+        
+        # One session per thread, checked out only for the unit of work
+        self.Session = scoped_session(sessionmaker(bind=self.engine, expire_on_commit=False))
+        self.ReadSession = scoped_session(sessionmaker(bind=self.read_engine))
+    
+    def _add_missing_columns(self):
+        """Add nullable columns introduced after a table was first created.
+
+        Safe to run from several workers at once: Postgres skips columns
+        that already exist, and elsewhere a losing ALTER is ignored once
+        the column is confirmed present.
+        """
+        dialect = self.engine.dialect
+        preparer = dialect.identifier_preparer
+        if_not_exists = "IF NOT EXISTS " if dialect.name == "postgresql" else ""
+        
+        for table in Base.metadata.sorted_tables:
+            existing = {c['name'] for c in inspect(self.engine).get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                
+                statement = (
+                    f"ALTER TABLE {preparer.format_table(table)} "
+                    f"ADD COLUMN {if_not_exists}{preparer.format_column(column)} "
+                    f"{column.type.compile(dialect)}"
+                )
+                try:
+                    with self.engine.begin() as conn:
+                        conn.execute(text(statement))
+                except Exception:
+                    # Another worker may have added it first
+                    current = {c['name'] for c in inspect(self.engine).get_columns(table.name)}
+                    if column.name not in current:
+                        raise
+    
+    @contextmanager
+    def write_session(self):
+        """Transactional session on the write engine"""
+        session = self.Session()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            self.Session.remove()
+    
+    @contextmanager
+    def read_session(self):
+        """Session on the read engine, released when done"""
+        session = self.ReadSession()
+        try:
+            yield session
+        finally:
+            self.ReadSession.remove()
     
     def save_signal(self, signal):
         """Save a trading signal to database"""
@@ -35,6 +190,7 @@ class DatabaseManager:
             # Convert lists to JSON strings
             reasons_json = json.dumps(signal.get('reasons', []))
             indicators_json = json.dumps(signal.get('indicators', {}))
+            risk = signal.get('risk', {})
             
             # Create signal record
             signal_record = TradingSignal(
@@ -42,28 +198,59 @@ class DatabaseManager:
                 confidence=signal.get('confidence', 0.0),
                 price=signal.get('price', 0.0),
                 reasons=reasons_json,
-                indicators=indicators_json
+                indicators=indicators_json,
+                stop_loss=risk.get('stop_loss'),
+                take_profit=risk.get('take_profit'),
+                position_size=risk.get('position_size')
             )
             
             # Save to database
-            self.session.add(signal_record)
-            self.session.commit()
+            with self.write_session() as session:
+                session.add(signal_record)
             
             print(f"✅ Signal saved to database (ID: {signal_record.id})")
             return True
             
         except Exception as e:
             print(f"❌ Error saving signal to database: {e}")
-            self.session.rollback()
             return False
     
+    def save_price_history(self, historical):
+        """Save closed historical price bars, updating bars already stored"""
+        try:
+            if not historical or not historical.get('prices'):
+                return 0
+            
+            dates = [datetime.strptime(d, '%Y-%m-%d') for d in historical['dates']]
+            closes = historical['prices']
+            highs = historical.get('highs') or closes
+            lows = historical.get('lows') or closes
+            
+            # Today's bar is still trading; store it once it has closed
+            today = datetime.combine(datetime.now().date(), datetime.min.time())
+            
+            saved = 0
+            with self.write_session() as session:
+                for d, c, h, l in zip(dates, closes, highs, lows):
+                    if d >= today:
+                        continue
+                    session.merge(PriceBar(timestamp=d, close=c, high=h, low=l))
+                    saved += 1
+            
+            return saved
+            
+        except Exception as e:
+            print(f"❌ Error saving price history: {e}")
+            return 0
+    
     def get_recent_signals(self, limit=10):
         """Get recent trading signals"""
         try:
-            signals = self.session.query(TradingSignal)\
-                .order_by(TradingSignal.timestamp.desc())\
-                .limit(limit)\
-                .all()
+            with self.read_session() as session:
+                signals = session.query(TradingSignal)\
+                    .order_by(TradingSignal.timestamp.desc())\
+                    .limit(limit)\
+                    .all()
             
             return signals
             
@@ -71,20 +258,37 @@ class DatabaseManager:
             print(f"Error getting signals: {e}")
             return []
     
+    def get_trade_results(self, limit=1000):
+        """Get R-multiples of the most recent labeled trades"""
+        try:
+            with self.read_session() as session:
+                rows = session.query(SignalOutcome.r_multiple)\
+                    .filter(SignalOutcome.r_multiple.isnot(None))\
+                    .order_by(SignalOutcome.signal_id.desc())\
+                    .limit(limit)\
+                    .all()
+            
+            return [row[0] for row in rows]
+            
+        except Exception as e:
+            print(f"Error getting trade results: {e}")
+            return []
+    
     def get_performance_stats(self):
         """Get trading performance statistics"""
         try:
-            # Count signals by type
-            total = self.session.query(TradingSignal).count()
-            buys = self.session.query(TradingSignal)\
-                .filter(TradingSignal.action == 'BUY').count()
-            sells = self.session.query(TradingSignal)\
-                .filter(TradingSignal.action == 'SELL').count()
-            
-            # Get average confidence
-            avg_confidence = self.session.query(
-                func.avg(TradingSignal.confidence)
-            ).scalar() or 0
+            with self.read_session() as session:
+                # Count signals by type
+                total = session.query(TradingSignal).count()
+                buys = session.query(TradingSignal)\
+                    .filter(TradingSignal.action == 'BUY').count()
+                sells = session.query(TradingSignal)\
+                    .filter(TradingSignal.action == 'SELL').count()
+                
+                # Get average confidence
+                avg_confidence = session.query(
+                    func.avg(TradingSignal.confidence)
+                ).scalar() or 0
             
             return {
                 'total_signals': total,
@@ -109,6 +313,14 @@ def get_recent_signals(limit=10):
     """Get recent signals"""
     return db_manager.get_recent_signals(limit)
 
+def get_trade_results(limit=1000):
+    """Get recent trade R-multiples"""
+    return db_manager.get_trade_results(limit)
+
+def save_price_history(historical):
+    """Save historical price bars to database"""
+    return db_manager.save_price_history(historical)
+
 # Test function
 if __name__ == "__main__":
     print("Testing database...")
@@ -6,6 +6,11 @@ from datetime import datetime
 from data_collector import collect_gold_data
 from signal_generator import generate_signals
 from alert_system import send_alert
+from database import save_signal, save_price_history, get_trade_results
+from risk_manager import simulate_drawdowns
+from outcome_labeler import label_signal_outcomes
+from coordinator import coordinator
+from config import SYMBOL, RUN_INTERVAL_MINUTES
 
 def run_bot():
     """Main function to run the trading bot"""
@@ -26,6 +31,11 @@ def run_bot():
         print("🤖 Analyzing signals...")
         signals = generate_signals(market_data)
         
+        # Store signal and price bars for outcome labeling
+        save_price_history(market_data.get('atr_history'))
+        if signals:
+            save_signal(signals)
+        
         # Step 3: Display results
         print(f"\n📈 Current XAUUSD Price: ${market_data['gold_price']:.2f}")
         print(f"📊 USD Index (DXY): {market_data['dxy']:.2f}")
@@ -33,12 +43,23 @@ def run_bot():
         if signals:
             print(f"\n🎯 Trading Signal: {signals['action']}")
             print(f"💪 Confidence: {signals['confidence']:.2%}")
-            print(f"📝 Reason: {signals['reason']}")
+            print(f"📝 Reason: {', '.join(signals['reasons'])}")
+            
+            # Drawdown outlook from past labeled trades
+            risk_report = simulate_drawdowns(get_trade_results())
+            if risk_report:
+                print(f"📉 95% Max Drawdown: {risk_report['drawdown_95']:.2%}")
+                print(f"☠️ Risk of Ruin: {risk_report['risk_of_ruin']:.2%}")
             
-            # Step 4: Send alert if strong signal
+            # Step 4: Send alert if strong signal (once per tick across replicas)
             if abs(signals['confidence']) > 0.7:
-                print("🔔 Sending alert for strong signal...")
-                send_alert(signals)
+                alert_key = f"{SYMBOL}:{signals['action']}:{coordinator.current_tick():%Y%m%d%H%M}"
+                if coordinator.claim_alert(alert_key):
+                    print("🔔 Sending alert for strong signal...")
+                    if not send_alert(signals):
+                        coordinator.release_alert(alert_key)
+                else:
+                    print("🔕 Alert already sent by another worker")
         else:
             print("\n⏸️ No clear signal at this time")
             
@@ -52,19 +73,33 @@ def main():
     print("🚀 Starting Gold Trading Bot")
     print("⚠️ Remember: This is for educational purposes only!")
     
+    # Join the worker pool; only the leader of each job runs it.
+    # Heartbeats run in the background so long jobs keep their leases.
+    coordinator.start_heartbeat()
+    print(f"🤝 Worker {coordinator.worker_id} joined")
+    bot_job = f"run_bot:{SYMBOL}"
+    
     # Run immediately once
-    run_bot()
+    coordinator.run_if_leader(bot_job, run_bot)
     
     # Schedule to run every 15 minutes
-    schedule.every(15).minutes.do(run_bot)
+    schedule.every(RUN_INTERVAL_MINUTES).minutes.do(coordinator.run_if_leader, bot_job, run_bot)
+    
+    # Label stored signals with their outcomes once a day
+    schedule.every().day.at("00:30").do(
+        coordinator.run_if_leader, "label_outcomes", label_signal_outcomes
+    )
     
-    print("\n⏰ Bot scheduled to run every 15 minutes")
+    print(f"\n⏰ Bot scheduled to run every {RUN_INTERVAL_MINUTES} minutes")
     print("🛑 Press Ctrl+C to stop\n")
     
     # Keep running
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+    try:
+        while True:
+            schedule.run_pending()
+            time.sleep(1)
+    finally:
+        coordinator.release_all()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,235 @@
+# outcome_labeler.py - Label stored signals with forward returns and stop/target outcomes
+import json
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, insert
+from config import (
+    STOP_LOSS_ATR_MULTIPLIER,
+    TAKE_PROFIT_RATIO,
+    OUTCOME_HORIZONS,
+    OUTCOME_BATCH_SIZE
+)
+from database import db_manager, TradingSignal, PriceBar, SignalOutcome
+from risk_manager import calculate_atr
+
+CONFIDENCE_BUCKETS = [0.0, 0.3, 0.5, 0.7, 1.0]
+
+class OutcomeLabeler:
+    def __init__(self, db=None, horizons=OUTCOME_HORIZONS, batch_size=OUTCOME_BATCH_SIZE):
+        self.db = db or db_manager
+        self.horizons = tuple(sorted(horizons))
+        self.max_horizon = self.horizons[-1]
+        self.batch_size = batch_size
+
+    def load_price_history(self):
+        """Load stored price bars with ATR, oldest first"""
+        query = select(PriceBar.timestamp, PriceBar.close, PriceBar.high, PriceBar.low)\
+            .order_by(PriceBar.timestamp)
+        bars = pd.read_sql(query, self.db.read_engine, parse_dates=['timestamp'])
+        bars['atr'] = calculate_atr(bars['high'], bars['low'], bars['close'])
+        return bars
+
+    def load_unlabeled_signals(self, after_id, since):
+        """Load the next batch of signals without an outcome row"""
+        query = select(
+                TradingSignal.id,
+                TradingSignal.timestamp,
+                TradingSignal.action,
+                TradingSignal.price,
+                TradingSignal.stop_loss,
+                TradingSignal.take_profit
+            )\
+            .outerjoin(SignalOutcome, SignalOutcome.signal_id == TradingSignal.id)\
+            .where(SignalOutcome.signal_id.is_(None))\
+            .where(TradingSignal.id > after_id)\
+            .where(TradingSignal.timestamp >= since)\
+            .order_by(TradingSignal.id)\
+            .limit(self.batch_size)
+        # Anti-join against the primary: a lagging replica would return rows
+        # already labeled there and the insert would hit their primary keys
+        return pd.read_sql(query, self.db.engine, parse_dates=['timestamp'])
+
+    def label_signals(self, signals, bars):
+        """Compute forward returns and first stop/target hit for a batch of signals.
+
+        Stop and target distances are the ones issued with the signal; older
+        signals saved without them fall back to the ATR of the entry bar.
+        Signals whose full horizon is not yet covered by price history are
+        left out, so they are picked up again on a later run.
+        """
+        bar_times = bars['timestamp'].to_numpy()
+        close = bars['close'].to_numpy()
+        high = bars['high'].to_numpy()
+        low = bars['low'].to_numpy()
+        atr = bars['atr'].to_numpy()
+
+        # Enter at the close of the signal's own bar, the first close after the
+        # signal; excursions start on the next bar, so nothing the signal already
+        # saw leaks into its outcome, and entry, excursions and ATR share one series
+        entry_idx = np.searchsorted(bar_times, signals['timestamp'].to_numpy(), side='right') - 1
+        ready = (entry_idx >= 0) & (entry_idx + self.max_horizon < len(bars))
+        entry_idx = np.where(ready, entry_idx, 0)
+        direction = signals['action'].map({'BUY': 1.0, 'SELL': -1.0}).fillna(0.0).to_numpy()
+
+        quote = signals['price'].to_numpy(dtype=float)
+        stop_distance = np.abs(quote - signals['stop_loss'].to_numpy(dtype=float))
+        target_distance = np.abs(signals['take_profit'].to_numpy(dtype=float) - quote)
+        fallback_stop = STOP_LOSS_ATR_MULTIPLIER * atr[entry_idx]
+        saved = np.isfinite(stop_distance) & np.isfinite(target_distance)
+        stop_distance = np.where(saved, stop_distance, fallback_stop)
+        target_distance = np.where(saved, target_distance, fallback_stop * TAKE_PROFIT_RATIO)
+        # HOLD signals are labeled NONE and need no stop
+        ready &= np.isfinite(stop_distance) | (direction == 0)
+
+        signals = signals[ready]
+        entry_idx = entry_idx[ready]
+        direction = direction[ready]
+        stop_distance = stop_distance[ready]
+        target_distance = target_distance[ready]
+        price = close[entry_idx]
+
+        labels = pd.DataFrame({'signal_id': signals['id'].to_numpy()})
+        for h in self.horizons:
+            labels[f'return_{h}'] = close[entry_idx + h] / price - 1
+
+        # Favorable / adverse excursion per forward bar, shape (signals, max_horizon)
+        window = entry_idx[:, None] + np.arange(1, self.max_horizon + 1)
+        is_long = direction[:, None] > 0
+        favorable = np.where(is_long, high[window] - price[:, None], price[:, None] - low[window])
+        adverse = np.where(is_long, price[:, None] - low[window], high[window] - price[:, None])
+
+        target_hit = favorable >= target_distance[:, None]
+        stop_hit = adverse >= stop_distance[:, None]
+        no_hit = self.max_horizon
+        first_target = np.where(target_hit.any(axis=1), target_hit.argmax(axis=1), no_hit)
+        first_stop = np.where(stop_hit.any(axis=1), stop_hit.argmax(axis=1), no_hit)
+
+        # A bar touching both levels counts as a stop (conservative)
+        hit_target = first_target < first_stop
+        hit_stop = (first_stop <= first_target) & (first_stop < no_hit)
+
+        exit_return = direction * (close[entry_idx + self.max_horizon] - price)
+        open_r = np.divide(exit_return, stop_distance,
+                           out=np.zeros_like(exit_return), where=stop_distance > 0)
+        target_r = np.divide(target_distance, stop_distance,
+                             out=np.zeros_like(target_distance), where=stop_distance > 0)
+
+        directional = direction != 0
+        labels['outcome'] = np.select(
+            [~directional, hit_target, hit_stop],
+            ['NONE', 'TARGET', 'STOP'],
+            default='OPEN'
+        )
+        labels['bars_to_exit'] = np.where(
+            hit_target, first_target + 1, np.where(hit_stop, first_stop + 1, self.max_horizon)
+        )
+        labels['r_multiple'] = np.where(
+            hit_target, target_r, np.where(hit_stop, -1.0, open_r)
+        )
+        labels.loc[~directional, 'r_multiple'] = np.nan
+
+        return labels
+
+    def run(self):
+        """Label every unlabeled signal covered by stored price history"""
+        bars = self.load_price_history()
+        if bars.empty:
+            print("⏸️ No price history stored, nothing to label")
+            return 0
+
+        since = bars['timestamp'].iloc[0].to_pydatetime()
+        after_id = 0
+        total = 0
+
+        while True:
+            signals = self.load_unlabeled_signals(after_id, since)
+            if signals.empty:
+                break
+            after_id = int(signals['id'].iloc[-1])
+
+            labels = self.label_signals(signals, bars)
+            if labels.empty:
+                continue
+
+            try:
+                labels['labeled_at'] = datetime.utcnow()
+                records = labels.astype(object).where(labels.notna(), None).to_dict('records')
+                # Core executemany keeps this a single batched INSERT
+                with self.db.write_session() as session:
+                    session.connection().execute(insert(SignalOutcome.__table__), records)
+                total += len(records)
+            except Exception as e:
+                print(f"❌ Error saving signal outcomes: {e}")
+                break
+
+        print(f"✅ Labeled {total} signals")
+        return total
+
+    def get_outcome_stats(self):
+        """Hit rate and expectancy per confidence bucket and per reason"""
+        try:
+            query = select(
+                    TradingSignal.confidence,
+                    TradingSignal.reasons,
+                    SignalOutcome.outcome,
+                    SignalOutcome.r_multiple
+                )\
+                .join(SignalOutcome, SignalOutcome.signal_id == TradingSignal.id)\
+                .where(SignalOutcome.outcome != 'NONE')
+            outcomes = pd.read_sql(query, self.db.read_engine)
+
+            if outcomes.empty:
+                return {}
+
+            outcomes['hit'] = outcomes['outcome'] == 'TARGET'
+            outcomes['bucket'] = pd.cut(
+                outcomes['confidence'], CONFIDENCE_BUCKETS, include_lowest=True
+            ).astype(str)
+
+            # Strip indicator values so "Oversold (RSI: 28.5)" groups as "Oversold"
+            by_reason = outcomes.assign(reason=outcomes['reasons'].map(json.loads))\
+                .explode('reason')\
+                .dropna(subset=['reason'])
+            by_reason['reason'] = by_reason['reason'].str.replace(r'\s*\(.*\)$', '', regex=True)
+
+            return {
+                'labeled_signals': len(outcomes),
+                'hit_rate': round(float(outcomes['hit'].mean()), 4),
+                'expectancy': round(float(outcomes['r_multiple'].mean()), 4),
+                'by_confidence': self._summarize(outcomes, 'bucket'),
+                'by_reason': self._summarize(by_reason, 'reason')
+            }
+
+        except Exception as e:
+            print(f"Error getting outcome stats: {e}")
+            return {}
+
+    def _summarize(self, outcomes, key):
+        grouped = outcomes.groupby(key, observed=True).agg(
+            count=('hit', 'size'),
+            hit_rate=('hit', 'mean'),
+            expectancy=('r_multiple', 'mean')
+        ).round(4)
+        return grouped.to_dict('index')
+
+# Convenience functions
+def label_signal_outcomes():
+    """Label stored signals with their outcomes"""
+    return OutcomeLabeler().run()
+
+def get_outcome_stats():
+    """Get hit rate and expectancy of labeled signals"""
+    return OutcomeLabeler().get_outcome_stats()
+
+# Batch job entry point
+if __name__ == "__main__":
+    print("Labeling signal outcomes...")
+    label_signal_outcomes()
+
+    stats = get_outcome_stats()
+    print(f"Hit rate: {stats.get('hit_rate', 0):.2%}")
+    print(f"Expectancy: {stats.get('expectancy', 0):.2f}R")
+    for bucket, row in stats.get('by_confidence', {}).items():
+        print(f"  Confidence {bucket}: {row['count']} signals, "
+              f"{row['hit_rate']:.2%} hit rate, {row['expectancy']:.2f}R")
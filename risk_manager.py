@@ -0,0 +1,142 @@
+# risk_manager.py - Stop, target and position sizing with Monte Carlo drawdown simulation
+import numpy as np
+from config import (
+    ACCOUNT_CAPITAL,
+    MAX_POSITION_SIZE,
+    MAX_LEVERAGE,
+    STOP_LOSS_ATR_MULTIPLIER,
+    TAKE_PROFIT_RATIO,
+    ATR_PERIOD,
+    MONTE_CARLO_SIMULATIONS,
+    MONTE_CARLO_TRADES,
+    RUIN_THRESHOLD
+)
+
+def calculate_atr(highs, lows, closes, period=ATR_PERIOD):
+    """Average True Range per bar, NaN until a full period of true ranges exists"""
+    highs = np.asarray(highs, dtype=float)
+    lows = np.asarray(lows, dtype=float)
+    closes = np.asarray(closes, dtype=float)
+
+    atr = np.full(len(closes), np.nan)
+    if len(closes) <= period:
+        return atr
+
+    prev_close = closes[:-1]
+    true_range = np.maximum.reduce([
+        highs[1:] - lows[1:],
+        np.abs(highs[1:] - prev_close),
+        np.abs(lows[1:] - prev_close)
+    ])
+
+    # Rolling mean of the last `period` true ranges via cumulative sums
+    totals = np.concatenate([[0.0], np.cumsum(true_range)])
+    atr[period:] = (totals[period:] - totals[:-period]) / period
+    return atr
+
+class RiskManager:
+    def __init__(self, capital=ACCOUNT_CAPITAL, risk_per_trade=MAX_POSITION_SIZE,
+                 max_leverage=MAX_LEVERAGE):
+        self.capital = capital
+        self.risk_per_trade = risk_per_trade
+        self.max_leverage = max_leverage
+        self.rng = np.random.default_rng()
+
+    def attach_risk(self, signal, historical):
+        """Add ATR stop, take-profit and position size to a signal"""
+        if not signal or signal["action"] == "HOLD":
+            return signal
+
+        historical = historical or {}
+        closes = historical.get("prices") or [signal["price"]]
+        atr = float(calculate_atr(
+            historical.get("highs") or closes,
+            historical.get("lows") or closes,
+            closes
+        )[-1])
+
+        if not atr > 0:
+            return signal
+
+        price = signal["price"]
+        direction = 1 if signal["action"] == "BUY" else -1
+        stop_distance = STOP_LOSS_ATR_MULTIPLIER * atr
+
+        # Size to risk a fixed share of capital, but never exceed the leverage cap
+        position_size = min(
+            self.capital * self.risk_per_trade / stop_distance,
+            self.capital * self.max_leverage / price
+        )
+        risk_amount = position_size * stop_distance
+
+        signal["risk"] = {
+            "atr": round(atr, 2),
+            "stop_loss": round(price - direction * stop_distance, 2),
+            "take_profit": round(price + direction * stop_distance * TAKE_PROFIT_RATIO, 2),
+            "position_size": round(position_size, 4),  # Ounces
+            "risk_amount": round(risk_amount, 2)
+        }
+
+        return signal
+
+    def simulate_drawdowns(self, r_multiples, simulations=MONTE_CARLO_SIMULATIONS,
+                           trades=MONTE_CARLO_TRADES):
+        """Bootstrap trade sequences and report drawdown distribution and risk of ruin"""
+        r_multiples = np.asarray(r_multiples, dtype=float)
+        r_multiples = r_multiples[np.isfinite(r_multiples)]
+
+        if len(r_multiples) == 0:
+            return {}
+
+        # Every simulated path at once, shape (simulations, trades)
+        samples = self.rng.choice(r_multiples, size=(simulations, trades))
+        equity = np.cumprod(1 + samples * self.risk_per_trade, axis=1)
+        peaks = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+        max_drawdown = (1 - equity / peaks).max(axis=1)
+        ruined = (equity <= 1 - RUIN_THRESHOLD).any(axis=1)
+
+        p50, p95, p99 = np.percentile(max_drawdown, [50, 95, 99])
+
+        return {
+            "simulations": simulations,
+            "trades": trades,
+            "median_drawdown": round(float(p50), 4),
+            "drawdown_95": round(float(p95), 4),
+            "drawdown_99": round(float(p99), 4),
+            "worst_drawdown": round(float(max_drawdown.max()), 4),
+            "risk_of_ruin": round(float(ruined.mean()), 4),
+            "median_return": round(float(np.median(equity[:, -1]) - 1), 4)
+        }
+
+# Global instance
+risk_manager = RiskManager()
+
+# Convenience functions
+def attach_risk(signal, historical):
+    """Add stop, target and size to signal"""
+    return risk_manager.attach_risk(signal, historical)
+
+def simulate_drawdowns(r_multiples):
+    """Run Monte Carlo drawdown simulation on trade results"""
+    return risk_manager.simulate_drawdowns(r_multiples)
+
+# Test function
+if __name__ == "__main__":
+    import time
+
+    test_signal = {"action": "BUY", "price": 1950.50}
+    test_historical = {
+        "prices": [1930, 1940, 1945, 1950, 1950.50, 1948, 1952, 1955, 1953, 1950,
+                   1956, 1960, 1958, 1962, 1957, 1951],
+        "highs": [1935, 1944, 1949, 1955, 1956, 1951, 1957, 1959, 1958, 1954,
+                  1961, 1964, 1963, 1966, 1962, 1956],
+        "lows": [1925, 1934, 1940, 1944, 1946, 1944, 1947, 1950, 1949, 1946,
+                 1950, 1954, 1953, 1956, 1952, 1946]
+    }
+    print(f"Risk: {attach_risk(test_signal, test_historical)['risk']}")
+
+    # 45% winners at 2R, 55% losers at -1R
+    test_results = np.where(np.random.default_rng(0).random(500) < 0.45, TAKE_PROFIT_RATIO, -1.0)
+    start = time.perf_counter()
+    report = simulate_drawdowns(test_results)
+    print(f"Monte Carlo ({(time.perf_counter() - start) * 1000:.1f} ms): {report}")
@@ -7,6 +7,7 @@ from config import (
     MA_SHORT_PERIOD, 
     MA_LONG_PERIOD
 )
+from risk_manager import risk_manager
 
 class SignalGenerator:
     def __init__(self):
@@ -152,6 +153,9 @@ class SignalGenerator:
         
         signal["reasons"] = reasons
         
+        # Attach stop, target and position size
+        risk_manager.attach_risk(signal, data.get("atr_history") or historical)
+        
         # Add to history
         self.signals_history.append(signal)
         
@@ -171,7 +175,17 @@ class SignalGenerator:
         ║ Price:     ${signal['price']:>8.2f}              ║
         ║ RSI:       {signal['indicators']['rsi']:>8.1f}              ║
         ╚══════════════════════════════════════╝
+        """
+        
+        if "risk" in signal:
+            risk = signal["risk"]
+            summary += f"""
+        Stop Loss:   ${risk['stop_loss']:.2f}
+        Take Profit: ${risk['take_profit']:.2f}
+        Size:        {risk['position_size']:.4f} oz (risking ${risk['risk_amount']:.2f})
+        """
         
+        summary += """
         Reasons:
         """
         
@@ -200,6 +214,8 @@ if __name__ == "__main__":
         "real_yield": -0.3,
         "historical": {
             "prices": [1930, 1940, 1945, 1950, 1950.50, 1948, 1952, 1955, 1953, 1950],
+            "highs": [1935, 1944, 1949, 1955, 1956, 1951, 1957, 1959, 1958, 1954],
+            "lows": [1925, 1934, 1940, 1944, 1946, 1944, 1947, 1950, 1949, 1946],
             "dates": []
         }
     }